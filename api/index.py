@@ -1,12 +1,24 @@
 from flask import Flask, jsonify, request, Response
 import os
 import json
+import logging
 import traceback
 import requests
 import csv
 import io
-from garminconnect import Garmin
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date, timedelta
+from functools import lru_cache
+
+# Load .env for local development before the credential env vars are read
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
 
 # Try to import zoneinfo (Python 3.9+), fallback to pytz
 try:
@@ -17,8 +29,37 @@ except ImportError:
     def ZoneInfo(tz_name):
         return pytz.timezone(tz_name)
 
+# Use orjson for JSON serialization if available (much faster than stdlib)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 app = Flask(__name__)
 
+# Vercel captures stderr, so a plain logger replaces the old print calls;
+# %-style args mean disabled levels skip formatting entirely
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO'))
+logger = logging.getLogger(__name__)
+
+if orjson is not None:
+    from flask.json.provider import JSONProvider
+
+    class OrjsonProvider(JSONProvider):
+        """JSON provider backed by orjson so jsonify uses the C encoder."""
+
+        def dumps(self, obj, **kwargs):
+            return orjson.dumps(obj).decode('utf-8')
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+    app.json = OrjsonProvider(app)
+else:
+    # Stdlib fallback: skip key sorting and emit compact separators
+    app.json.sort_keys = False
+    app.json.compact = True
+
 # CSV Header columns
 CSV_HEADERS = [
     'date', 'totalSteps', 'stepsYesterday', 'distanceMeters', 'floorsClimbed', 
@@ -42,9 +83,169 @@ CSV_HEADERS = [
     'waistInches', 'waistDate'
 ]
 
+# (CSV column, response section, key within the section) - the CSV row
+# mirrors the JSON response, so it is derived from the response instead of
+# repeating every field lookup by hand
+CSV_FROM_RESPONSE = (
+    ('totalSteps', 'summary', 'totalSteps'),
+    ('stepsYesterday', 'summary', 'stepsYesterday'),
+    ('distanceMeters', 'summary', 'distanceMeters'),
+    ('floorsClimbed', 'summary', 'floorsClimbed'),
+    ('restingHeartRate', 'summary', 'restingHeartRate'),
+    ('minHeartRate', 'summary', 'minHeartRate'),
+    ('maxHeartRate', 'summary', 'maxHeartRate'),
+    ('activeKilocalories', 'summary', 'activeKilocalories'),
+    ('totalKilocalories', 'summary', 'totalKilocalories'),
+    ('intensityMinutes', 'summary', 'intensityMinutes'),
+    ('moderateIntensityMinutes', 'summary', 'moderateIntensityMinutes'),
+    ('vigorousIntensityMinutes', 'summary', 'vigorousIntensityMinutes'),
+    ('sleepScore', 'sleep', 'overallScore'),
+    ('sleepTotalSeconds', 'sleep', 'totalSeconds'),
+    ('sleepDeep', 'sleep', 'deepSeconds'),
+    ('sleepLight', 'sleep', 'lightSeconds'),
+    ('sleepRem', 'sleep', 'remSeconds'),
+    ('sleepAwake', 'sleep', 'awakeSeconds'),
+    ('sleepStress', 'sleep', 'avgStress'),
+    ('sleepSpO2', 'sleep', 'avgSpO2'),
+    ('sleepRespiration', 'sleep', 'avgRespiration'),
+    ('sleepStart', 'sleep', 'startTime'),
+    ('sleepEnd', 'sleep', 'endTime'),
+    ('sleepConsistency', 'sleep', 'consistency'),
+    ('sleepAlignment', 'sleep', 'alignment'),
+    ('sleepRestfulness', 'sleep', 'restfulness'),
+    ('stressAvg', 'stress', 'averageLevel'),
+    ('stressMax', 'stress', 'maxLevel'),
+    ('stressRest', 'stress', 'restDurationSeconds'),
+    ('stressLow', 'stress', 'lowDurationSeconds'),
+    ('stressMed', 'stress', 'mediumDurationSeconds'),
+    ('stressHigh', 'stress', 'highDurationSeconds'),
+    ('bbCurrent', 'bodyBattery', 'current'),
+    ('bbHigh', 'bodyBattery', 'highest'),
+    ('bbLow', 'bodyBattery', 'lowest'),
+    ('bbCharged', 'bodyBattery', 'charged'),
+    ('bbDrained', 'bodyBattery', 'drained'),
+    ('hrvAverage', 'hrv', 'average'),
+    ('hrvStatus', 'hrv', 'status'),
+    ('hrvBalanced', 'hrv', 'balanced'),
+    ('hrvUnbalanced', 'hrv', 'unbalanced'),
+    ('trainingReadinessScore', 'trainingReadiness', 'score'),
+    ('trainingReadinessStatus', 'trainingReadiness', 'status'),
+    ('trainingStatusKey', 'trainingStatus', 'statusKey'),
+    ('trainingStatusLabel', 'trainingStatus', 'statusLabel'),
+    ('vo2MaxValue', 'trainingStatus', 'vo2Max'),
+    ('fitnessAge', 'trainingStatus', 'fitnessAge'),
+    ('fitnessTrend', 'trainingStatus', 'fitnessTrend'),
+    ('acuteLoad', 'trainingStatus', 'acuteLoad'),
+    ('chronicLoad', 'trainingStatus', 'chronicLoad'),
+    ('loadRatio', 'trainingStatus', 'loadRatio'),
+    ('loadStatus', 'trainingStatus', 'loadStatus'),
+    ('trainingLoadBalance', 'trainingStatus', 'trainingLoadBalance'),
+    ('aerobicLow', 'trainingStatus', 'aerobicLow'),
+    ('aerobicHigh', 'trainingStatus', 'aerobicHigh'),
+    ('anaerobic', 'trainingStatus', 'anaerobic'),
+    ('respirationAvg', 'allDayRespiration', 'average'),
+    ('respirationMin', 'allDayRespiration', 'min'),
+    ('respirationMax', 'allDayRespiration', 'max'),
+    ('spo2Avg', 'allDaySpO2', 'average'),
+    ('spo2Min', 'allDaySpO2', 'min'),
+    ('skinTempVariance', 'skinTemp', 'variance'),
+)
+
+# (response key, Garmin field) pairs for the flat daily-summary section
+SUMMARY_FIELDS = (
+    ('totalSteps', 'totalSteps'),
+    ('distanceMeters', 'totalDistanceMeters'),
+    ('floorsClimbed', 'floorsAscended'),
+    ('restingHeartRate', 'restingHeartRate'),
+    ('minHeartRate', 'minHeartRate'),
+    ('maxHeartRate', 'maxHeartRate'),
+    ('activeKilocalories', 'activeKilocalories'),
+    ('totalKilocalories', 'totalKilocalories'),
+    ('moderateIntensityMinutes', 'moderateIntensityMinutes'),
+    ('vigorousIntensityMinutes', 'vigorousIntensityMinutes'),
+)
+
+# (response key, dailySleepDTO field) pairs for the sleep section
+SLEEP_FIELDS = (
+    ('totalSeconds', 'sleepTimeSeconds'),
+    ('deepSeconds', 'deepSleepSeconds'),
+    ('lightSeconds', 'lightSleepSeconds'),
+    ('remSeconds', 'remSleepSeconds'),
+    ('awakeSeconds', 'awakeSleepSeconds'),
+    ('avgStress', 'avgSleepStress'),
+    ('avgSpO2', 'averageSpO2Value'),
+    ('avgRespiration', 'averageRespirationValue'),
+    ('startTime', 'sleepStartTimestampGMT'),
+    ('endTime', 'sleepEndTimestampGMT'),
+)
+
+def pick(source, fields):
+    """Build a dict from (output key, source key) pairs, defaulting to 0."""
+    get = source.get
+    return {out: get(src) or 0 for out, src in fields}
+
+# Stress level -> bucket index (0 rest, 1 low, 2 medium, 3 high) for 0-100;
+# readings above 100 are clamped into the high bucket
+_STRESS_BUCKET = bytes([0] * 26 + [1] * 25 + [2] * 25 + [3] * 25)
+
+# Each stress reading covers a 3-minute sampling window
+STRESS_SAMPLE_SECONDS = 180
+
+def first_of(source, *keys, default=0):
+    """Return the first truthy value among alias keys (API spelling variants)."""
+    for key in keys:
+        value = source.get(key)
+        if value:
+            return value
+    return default
+
+@lru_cache(maxsize=8)
+def get_zoneinfo(tz_name):
+    """ZoneInfo with the tzdata load cached; the user's zone rarely changes."""
+    return ZoneInfo(tz_name)
+
 BLOB_TOKEN = os.environ.get('BLOB_READ_WRITE_TOKEN', '')
 CSV_FILENAME = 'garmin-data.csv'
 
+# Shared session for all blob I/O so the TLS connection to the blob host is
+# reused across the GET/PUT/DELETE calls a single request can make; the
+# adapter keeps a few pooled connections warm and retries transient 5xx
+# responses from the blob CDN
+_http = requests.Session()
+_http.mount('https://', requests.adapters.HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=requests.adapters.Retry(
+        total=2, backoff_factor=0.1, status_forcelist=[502, 503, 504]
+    ),
+))
+
+# Credentials are read once at import; on Vercel the env is fixed for the
+# lifetime of the instance, so there's no point re-reading (and for
+# GARMIN_TOKENS, re-parsing) a multi-KB blob per request
+GARMIN_EMAIL = os.environ.get('GARMIN_EMAIL')
+GARMIN_PASSWORD = os.environ.get('GARMIN_PASSWORD')
+GARMIN_TOKENS = os.environ.get('GARMIN_TOKENS')
+
+# Cache the serialized /api/stats payload in-process for a short window so
+# repeated polls hitting a warm instance skip the Garmin round-trips entirely.
+STATS_CACHE_SECONDS = 120
+_stats_cache = {'payload': None, 'etag': None, 'expires': 0.0}
+
+# Serializes cache refreshes so a burst of polls results in one Garmin fan-out
+_stats_refresh_lock = threading.Lock()
+
+# Let the browser reuse a fresh payload without asking, then revalidate via
+# the ETag; private because the payload is one user's health data
+STATS_CACHE_CONTROL = 'private, max-age=60'
+
+def stats_response(payload, etag):
+    """Wrap the serialized stats payload, answering 304 on a matching ETag."""
+    headers = {'ETag': etag, 'Cache-Control': STATS_CACHE_CONTROL}
+    if request.headers.get('If-None-Match') == etag:
+        return Response(status=304, headers=headers)
+    return Response(payload, mimetype='application/json', headers=headers)
+
 def list_blobs():
     """List blobs to find CSV file URL."""
     if not BLOB_TOKEN:
@@ -54,47 +255,79 @@ def list_blobs():
         headers = {
             'Authorization': f'Bearer {BLOB_TOKEN}'
         }
-        response = requests.get('https://blob.vercel-storage.com', headers=headers, timeout=10)
+        response = _http.get('https://blob.vercel-storage.com', headers=headers, timeout=10)
         if response.status_code == 200:
             data = response.json()
             return data.get('blobs', [])
         return []
     except Exception as e:
-        print(f"Error listing blobs: {e}")
+        logger.warning("Error listing blobs: %s", e)
         return []
 
+# The CSV URL only changes when we write it, so it can be cached briefly on
+# warm instances; writes refresh it from the PUT response and a failed read
+# invalidates it, keeping staleness self-correcting
+BLOB_URL_CACHE_SECONDS = 60
+_blob_url_cache = {'url': None, 'expires': 0.0}
+
 def get_blob_url():
-    """Get the URL for our CSV blob by listing blobs (no caching to avoid stale data in serverless)."""
+    """Get the URL for our CSV blob, listing blobs only when the cache is cold."""
+    if _blob_url_cache['url'] and time.time() < _blob_url_cache['expires']:
+        return _blob_url_cache['url']
     blobs = list_blobs()
     # Find all blobs with our filename and get the most recently uploaded one
     matching_blobs = [b for b in blobs if b.get('pathname') == CSV_FILENAME]
     if matching_blobs:
         # Sort by uploadedAt descending and get the newest one
         matching_blobs.sort(key=lambda x: x.get('uploadedAt', ''), reverse=True)
-        return matching_blobs[0].get('url')
+        url = matching_blobs[0].get('url')
+        _blob_url_cache['url'] = url
+        _blob_url_cache['expires'] = time.time() + BLOB_URL_CACHE_SECONDS
+        return url
     return None
 
+# Parsed CSV rows cached in-process; the stored ETag lets reads revalidate
+# with a conditional GET and skip the download + re-parse on 304
+_csv_cache = {'etag': None, 'rows': None, 'last_body_comp': None, 'last_waist': None}
+
 def read_csv_from_blob():
     """Read CSV data from Vercel Blob storage."""
     if not BLOB_TOKEN:
         return []
-    
+
     try:
         blob_url = get_blob_url()
         if not blob_url:
-            print("CSV blob not found")
+            logger.info("CSV blob not found")
             return []
-        
-        # Add cache-busting query param to avoid CDN cached content
-        cache_bust_url = f"{blob_url}?t={datetime.now().timestamp()}"
-        response = requests.get(cache_bust_url, timeout=10, headers={'Cache-Control': 'no-cache'})
+
+        # No cache-busting query param: freshness comes from the ETag
+        # revalidation below, and a stable URL lets the CDN serve from edge
+        if _csv_cache['etag'] and _csv_cache['rows'] is not None:
+            headers = {'If-None-Match': _csv_cache['etag']}
+        else:
+            # No ETag to revalidate against - cold start, or our own write
+            # just cleared it. Force the CDN back to origin so a stale edge
+            # copy can't resurrect pre-write rows into the cache (the next
+            # upsert would then rewrite the blob without the newer data)
+            headers = {'Cache-Control': 'no-cache'}
+
+        response = _http.get(blob_url, timeout=10, headers=headers)
+        if response.status_code == 304:
+            # Unchanged since the last parse; reuse the cached rows
+            return list(_csv_cache['rows'])
         if response.status_code == 200:
-            reader = csv.DictReader(io.StringIO(response.text))
-            return list(reader)
-        print(f"Failed to read CSV: {response.status_code}")
+            rows = list(csv.DictReader(io.StringIO(response.text)))
+            _csv_cache['rows'] = rows
+            _csv_cache['etag'] = response.headers.get('ETag')
+            _cache_last_known(rows)
+            return list(rows)
+        logger.warning("Failed to read CSV: %s", response.status_code)
+        # The cached URL may point at a deleted blob; relist next time
+        _blob_url_cache['url'] = None
         return []
     except Exception as e:
-        print(f"Error reading CSV from blob: {e}")
+        logger.warning("Error reading CSV from blob: %s", e)
         return []
 
 def delete_blob(url):
@@ -106,29 +339,24 @@ def delete_blob(url):
         headers = {
             'Authorization': f'Bearer {BLOB_TOKEN}'
         }
-        response = requests.delete(f'https://blob.vercel-storage.com?url={url}', headers=headers, timeout=10)
+        response = _http.delete(f'https://blob.vercel-storage.com?url={url}', headers=headers, timeout=10)
         return response.status_code in [200, 204]
     except Exception as e:
-        print(f"Error deleting blob: {e}")
+        logger.warning("Error deleting blob: %s", e)
         return False
 
 def write_csv_to_blob(rows):
     """Write CSV data to Vercel Blob storage."""
     if not BLOB_TOKEN:
-        print("BLOB_TOKEN not set, skipping CSV write")
+        logger.warning("BLOB_TOKEN not set, skipping CSV write")
         return False
     
     try:
-        # Get existing blobs to delete after upload
-        old_blobs = [b for b in list_blobs() if b.get('pathname') == CSV_FILENAME]
-        old_urls = [b.get('url') for b in old_blobs if b.get('url')]
-        
         # Create CSV content
         output = io.StringIO()
         writer = csv.DictWriter(output, fieldnames=CSV_HEADERS)
         writer.writeheader()
-        for row in rows:
-            writer.writerow(row)
+        writer.writerows(rows)
         csv_content = output.getvalue()
         
         # Upload to Vercel Blob
@@ -140,22 +368,34 @@ def write_csv_to_blob(rows):
             'x-add-random-suffix': 'false'  # Don't add random suffix, keep same filename
         }
         
-        response = requests.put(upload_url, data=csv_content.encode('utf-8'), headers=headers, timeout=30)
+        response = _http.put(upload_url, data=csv_content.encode('utf-8'), headers=headers, timeout=30)
         
         if response.status_code in [200, 201]:
-            print(f"CSV uploaded successfully")
-            # Delete old blobs to avoid confusion
-            for old_url in old_urls:
-                delete_blob(old_url)
-                print(f"Deleted old blob: {old_url}")
+            logger.info("CSV uploaded successfully")
+            # The PUT response carries the (possibly new) blob URL
+            try:
+                _blob_url_cache['url'] = response.json().get('url')
+                _blob_url_cache['expires'] = time.time() + BLOB_URL_CACHE_SECONDS
+            except ValueError:
+                _blob_url_cache['url'] = None
+            # Keep the row cache consistent with what we just uploaded; the
+            # new ETag is unknown until the next read revalidates
+            _csv_cache['rows'] = list(rows)
+            _csv_cache['etag'] = None
+            _cache_last_known(rows)
             return True
         else:
-            print(f"Failed to upload CSV: {response.status_code} - {response.text}")
+            logger.warning("Failed to upload CSV: %s - %s", response.status_code, response.text)
             return False
     except Exception as e:
-        print(f"Error writing CSV to blob: {e}")
+        logger.warning("Error writing CSV to blob: %s", e)
         return False
 
+def _cache_last_known(rows):
+    """Refresh the cached most-recent body comp / waist whenever rows change."""
+    _csv_cache['last_body_comp'] = get_last_body_composition(rows)
+    _csv_cache['last_waist'] = get_last_waist(rows)
+
 def get_last_body_composition(rows):
     """Get the most recent body composition data from CSV."""
     for row in reversed(rows):
@@ -180,204 +420,305 @@ def get_last_waist(rows):
             }
     return None
 
+# Token blob from the most recent successful login, kept so warm instances
+# reuse the fresh session instead of repeating the full OAuth flow.
+_session_tokens = None
+
+# Tokens are also mirrored to /tmp, which survives across cold starts on the
+# same Vercel instance, so a relogin isn't needed every time the process dies
+TOKENS_FILE = '/tmp/garth_tokens.json'
+
+def _read_tokens_file():
+    """Return the token blob cached on disk, or None."""
+    try:
+        with open(TOKENS_FILE) as f:
+            return f.read()
+    except OSError:
+        return None
+
+def _write_tokens_file(tokens_json):
+    try:
+        with open(TOKENS_FILE, 'w') as f:
+            f.write(tokens_json)
+    except OSError as e:
+        logger.warning("Could not write tokens file: %s", e)
+
+def _clear_tokens_file():
+    try:
+        os.remove(TOKENS_FILE)
+    except OSError:
+        pass
+
+# Authenticated client reused across requests on a warm instance, so the
+# underlying HTTP session (TLS connection pool, auth state) is built once.
+# The lock keeps concurrent requests from racing two login flows.
+_garmin_client = None
+_client_lock = threading.Lock()
+
+def invalidate_garmin_client():
+    """Drop the cached client (and its session tokens) after an auth failure."""
+    global _garmin_client, _session_tokens
+    _garmin_client = None
+    _session_tokens = None
+    _clear_tokens_file()
+
 def get_garmin_client():
     """Initialize and return authenticated Garmin client using stored session or credentials."""
-    email = os.environ.get('GARMIN_EMAIL')
-    password = os.environ.get('GARMIN_PASSWORD')
-    tokens_json = os.environ.get('GARMIN_TOKENS')
-    
-    if tokens_json:
+    if _garmin_client is not None:
+        return _garmin_client
+    with _client_lock:
+        # Another request may have built the client while we waited
+        if _garmin_client is not None:
+            return _garmin_client
+        return _build_garmin_client()
+
+def _build_garmin_client():
+    # Imported here rather than at module top: garminconnect drags in a large
+    # dependency chain, and routes like /api/health, /api/waist and
+    # /api/download never need it - keeping it lazy trims cold starts
+    from garminconnect import Garmin
+
+    global _garmin_client, _session_tokens
+
+    email = GARMIN_EMAIL
+    password = GARMIN_PASSWORD
+
+    # Freshest source first: this process's login, then the on-disk cache
+    # from a previous cold start, then the deploy-time env var
+    for tokens_json in (_session_tokens, _read_tokens_file(), GARMIN_TOKENS):
+        if not tokens_json:
+            continue
         try:
             client = Garmin()
             client.garth.loads(tokens_json)
             client.display_name = client.garth.profile["displayName"]
+            _garmin_client = client
             return client
         except Exception as e:
-            print(f"Stored tokens failed, trying credential login: {e}")
-    
+            logger.warning("Stored tokens failed, trying next source: %s", e)
+
+    _session_tokens = None
+    _clear_tokens_file()
+
     if not email or not password:
         raise ValueError(f"Missing credentials: email={'set' if email else 'missing'}, password={'set' if password else 'missing'}")
-    
+
     client = Garmin(email, password)
     client.login()
+
+    # Stash the session tokens so subsequent requests skip the login flow
+    try:
+        _session_tokens = client.garth.dumps()
+        _write_tokens_file(_session_tokens)
+    except Exception as e:
+        logger.warning("Could not save session tokens: %s", e)
+
+    _garmin_client = client
     return client
 
 @app.route('/api/stats')
 def get_stats():
     """Fetch today's Garmin stats and return as JSON."""
     try:
-        client = get_garmin_client()
-        
-        # Get user's timezone from Garmin
-        user_timezone = 'UTC'  # Default fallback
-        try:
-            user_settings = client.get_userprofile_settings()
-            user_timezone = user_settings.get('timeZone', 'UTC') or 'UTC'
-            print(f"Using Garmin timezone: {user_timezone}")
-        except Exception as e:
-            print(f"Error getting timezone, using UTC: {e}")
-        
-        # Calculate today in user's timezone
-        tz = ZoneInfo(user_timezone)
-        now_user_tz = datetime.now(tz)
-        today = now_user_tz.date().isoformat()
-        yesterday = (now_user_tz.date() - timedelta(days=1)).isoformat()
+        # Serve from the in-process cache while it's fresh
+        if _stats_cache['payload'] is not None and time.time() < _stats_cache['expires']:
+            return stats_response(_stats_cache['payload'], _stats_cache['etag'])
+
+        # Only one request rebuilds at a time: concurrent polls block here,
+        # then usually return the response the first one just cached.
+        with _stats_refresh_lock:
+            # Re-check - another request may have refreshed while we waited
+            if _stats_cache['payload'] is not None and time.time() < _stats_cache['expires']:
+                return stats_response(_stats_cache['payload'], _stats_cache['etag'])
+
+            client = get_garmin_client()
         
-        print(f"Date in {user_timezone}: {today}")
+            # Get user's timezone from Garmin
+            user_timezone = 'UTC'  # Default fallback
+            try:
+                user_settings = client.get_userprofile_settings()
+                user_timezone = user_settings.get('timeZone', 'UTC') or 'UTC'
+                logger.debug("Using Garmin timezone: %s", user_timezone)
+            except Exception as e:
+                logger.warning("Error getting timezone, using UTC: %s", e)
         
-        # Read existing CSV data
-        csv_rows = read_csv_from_blob()
+            # Calculate today in user's timezone
+            tz = get_zoneinfo(user_timezone)
+            now_user_tz = datetime.now(tz)
+            today = now_user_tz.date().isoformat()
+            yesterday = (now_user_tz.date() - timedelta(days=1)).isoformat()
         
-        # Get last known values
-        last_body_comp = get_last_body_composition(csv_rows)
-        last_waist = get_last_waist(csv_rows)
+            logger.debug("Date in %s: %s", user_timezone, today)
         
-        daily_stats = {}
-        yesterday_stats = {}
-        sleep_data = {}
-        stress_data = {}
-        body_battery = []
-        body_composition = {}
-        hrv_data = {}
-        training_readiness = {}
-        training_status = {}
-        respiration_data = {}
-        spo2_data = {}
+            # Fetch body composition for the last week only; anything older is
+            # already in the CSV and comes back via the last-known fallback,
+            # so the wide window just inflated the Garmin payload
+            start_date = (date.today() - timedelta(days=7)).isoformat()
 
-        try:
-            daily_stats = client.get_stats(today) or {}
-        except Exception as e:
-            print(f"Error fetching daily stats: {e}")
+            # Each call is an independent HTTPS round-trip, so run them
+            # concurrently - total latency becomes roughly the slowest single
+            # call instead of the sum of all of them. The CSV read hits blob
+            # storage, not Garmin, but it's independent too, so it joins the
+            # same fan-out instead of running serially before it.
+            fetches = {
+                'CSV rows': (read_csv_from_blob, (), []),
+                'daily stats': (client.get_stats, (today,), {}),
+                'yesterday stats': (client.get_stats, (yesterday,), {}),
+                'sleep data': (client.get_sleep_data, (today,), {}),
+                'stress data': (client.get_stress_data, (today,), {}),
+                'body battery': (client.get_body_battery, (today,), []),
+                'body composition': (client.get_body_composition, (start_date, today), {}),
+                'HRV data': (client.get_hrv_data, (today,), {}),
+                'training readiness': (client.get_training_readiness, (today,), {}),
+                'training status': (client.get_training_status, (today,), {}),
+                'respiration data': (client.get_respiration_data, (today,), {}),
+                'SpO2 data': (client.get_spo2_data, (today,), {}),
+            }
 
-        try:
-            yesterday_stats = client.get_stats(yesterday) or {}
-        except Exception as e:
-            print(f"Error fetching yesterday stats: {e}")
+            def fetch_one(name):
+                """Run one Garmin call, falling back to its default on failure."""
+                from garminconnect import GarminConnectAuthenticationError
 
-        try:
-            sleep_data = client.get_sleep_data(today) or {}
-        except Exception as e:
-            print(f"Error fetching sleep data: {e}")
+                func, args, default = fetches[name]
+                try:
+                    return func(*args) or default
+                except GarminConnectAuthenticationError as e:
+                    # Session went stale mid-flight; force a fresh login on
+                    # the next request instead of reusing the dead client
+                    logger.warning("Auth error fetching %s: %s", name, e)
+                    invalidate_garmin_client()
+                    return default
+                except Exception as e:
+                    logger.warning("Error fetching %s: %s", name, e)
+                    return default
 
-        try:
-            stress_data = client.get_stress_data(today) or {}
-        except Exception as e:
-            print(f"Error fetching stress data: {e}")
+            with ThreadPoolExecutor(max_workers=len(fetches)) as executor:
+                results = dict(zip(fetches, executor.map(fetch_one, fetches)))
 
-        try:
-            body_battery = client.get_body_battery(today) or []
-        except Exception as e:
-            print(f"Error fetching body battery: {e}")
+            csv_rows = results['CSV rows']
+            daily_stats = results['daily stats']
+            yesterday_stats = results['yesterday stats']
+            sleep_data = results['sleep data']
+            stress_data = results['stress data']
+            body_battery = results['body battery']
+            body_composition = results['body composition']
+            hrv_data = results['HRV data']
+            training_readiness = results['training readiness']
+            training_status = results['training status']
+            respiration_data = results['respiration data']
+            spo2_data = results['SpO2 data']
 
-        try:
-            # Fetch body composition for last 30 days to get most recent weight
-            start_date = (date.today() - timedelta(days=30)).isoformat()
-            body_composition = client.get_body_composition(start_date, today) or {}
-        except Exception as e:
-            print(f"Error fetching body composition: {e}")
+            # Get last known values
+            if csv_rows and _csv_cache['rows'] is not None:
+                # Computed once per parse/write; skips re-scanning history
+                last_body_comp = _csv_cache['last_body_comp']
+                last_waist = _csv_cache['last_waist']
+            else:
+                last_body_comp = get_last_body_composition(csv_rows)
+                last_waist = get_last_waist(csv_rows)
 
-        try:
-            hrv_data = client.get_hrv_data(today) or {}
-        except Exception as e:
-            print(f"Error fetching HRV data: {e}")
+            # Garmin occasionally hands back a non-dict payload (error string,
+            # bare list); normalize the dict-shaped blobs once so the
+            # extraction below can use plain .get without re-checking types.
+            def as_dict(value):
+                return value if isinstance(value, dict) else {}
 
-        try:
-            training_readiness = client.get_training_readiness(today) or {}
-        except Exception as e:
-            print(f"Error fetching training readiness: {e}")
+            stress_data = as_dict(stress_data)
+            body_composition = as_dict(body_composition)
+            hrv_data = as_dict(hrv_data)
+            training_status = as_dict(training_status)
+            respiration_data = as_dict(respiration_data)
+            spo2_data = as_dict(spo2_data)
 
-        try:
-            training_status = client.get_training_status(today) or {}
-        except Exception as e:
-            print(f"Error fetching training status: {e}")
+            # Extract sleep details from dailySleepDTO
+            sleep_dto = as_dict(as_dict(sleep_data).get('dailySleepDTO'))
 
-        try:
-            respiration_data = client.get_respiration_data(today) or {}
-        except Exception as e:
-            print(f"Error fetching respiration data: {e}")
+            # Pull all four sleep scores (and skin temp) in one walk of sleepScores
+            sleep_scores = sleep_dto.get('sleepScores', {}) or {}
+            overall_score = 0
+            sleep_consistency = 0
+            sleep_alignment = 0
+            sleep_restfulness = 0
 
-        try:
-            spo2_data = client.get_spo2_data(today) or {}
-        except Exception as e:
-            print(f"Error fetching SpO2 data: {e}")
-        
-        # Extract sleep details from dailySleepDTO
-        sleep_dto = {}
-        if isinstance(sleep_data, dict):
-            sleep_dto = sleep_data.get('dailySleepDTO', {}) or {}
-        
-        deep_seconds = sleep_dto.get('deepSleepSeconds', 0) or 0
-        light_seconds = sleep_dto.get('lightSleepSeconds', 0) or 0
-        rem_seconds = sleep_dto.get('remSleepSeconds', 0) or 0
-        awake_seconds = sleep_dto.get('awakeSleepSeconds', 0) or 0
-        
-        sleep_scores = sleep_dto.get('sleepScores', {}) or {}
-        overall_score = 0
-        if isinstance(sleep_scores, dict):
-            overall_obj = sleep_scores.get('overall', {}) or {}
-            if isinstance(overall_obj, dict):
-                overall_score = overall_obj.get('value', 0) or 0
+            if isinstance(sleep_scores, dict):
+                def score_value(name):
+                    obj = sleep_scores.get(name, {}) or {}
+                    return (obj.get('value', 0) or 0) if isinstance(obj, dict) else 0
+
+                overall_score = score_value('overall')
+                sleep_consistency = score_value('consistency')
+                sleep_alignment = score_value('alignment')
+                sleep_restfulness = score_value('restfulness')
+
+            skin_temp_variance = sleep_dto.get('skinTempVariance', 0) or 0
+
+            sleep_section = pick(sleep_dto, SLEEP_FIELDS)
+            sleep_section['overallScore'] = overall_score
+            sleep_section['consistency'] = sleep_consistency
+            sleep_section['alignment'] = sleep_alignment
+            sleep_section['restfulness'] = sleep_restfulness
         
-        # Body battery
-        bb_current = 0
-        bb_highest = 0
-        bb_lowest = 100
-        bb_charged = 0
-        bb_drained = 0
+            # Body battery
+            bb_current = 0
+            bb_highest = 0
+            bb_lowest = 100
+            bb_charged = 0
+            bb_drained = 0
         
-        if isinstance(body_battery, list) and len(body_battery) > 0:
-            bb_data = body_battery[0] if isinstance(body_battery[0], dict) else {}
-            bb_charged = bb_data.get('charged', 0) or 0
-            bb_drained = bb_data.get('drained', 0) or 0
-            
-            values_array = bb_data.get('bodyBatteryValuesArray', []) or []
-            if values_array:
-                levels = [item[1] for item in values_array if isinstance(item, list) and len(item) > 1 and item[1] is not None]
-                if levels:
-                    bb_highest = max(levels)
-                    bb_lowest = min(levels)
-                    bb_current = levels[-1] if levels else 0
-        
-        if bb_lowest == 100:
-            bb_lowest = 0
+            if isinstance(body_battery, list) and len(body_battery) > 0:
+                bb_data = body_battery[0] if isinstance(body_battery[0], dict) else {}
+                bb_charged = bb_data.get('charged', 0) or 0
+                bb_drained = bb_data.get('drained', 0) or 0
+
+                # Single pass over the samples: track min/max/last directly
+                # instead of building a level list and re-scanning it.
+                # EAFP on the index - well-formed [timestamp, level] pairs
+                # dominate, so try it and skip the rare malformed entry
+                for item in bb_data.get('bodyBatteryValuesArray', []) or []:
+                    try:
+                        level = item[1]
+                    except (IndexError, TypeError):
+                        continue
+                    if level is None:
+                        continue
+                    bb_current = level
+                    if level > bb_highest:
+                        bb_highest = level
+                    if level < bb_lowest:
+                        bb_lowest = level
         
-        # Stress data
-        rest_duration = 0
-        low_duration = 0
-        medium_duration = 0
-        high_duration = 0
+            if bb_lowest == 100:
+                bb_lowest = 0
         
-        if isinstance(stress_data, dict):
+            # Stress data - bucket each 3-minute sample via the lookup table
+            bucket_counts = [0, 0, 0, 0]
             stress_values = stress_data.get('stressValuesArray', []) or []
             for item in stress_values:
-                if isinstance(item, list) and len(item) > 1:
+                try:
                     level = item[1]
-                    if level is not None and level >= 0:
-                        if level <= 25:
-                            rest_duration += 180
-                        elif level <= 50:
-                            low_duration += 180
-                        elif level <= 75:
-                            medium_duration += 180
-                        else:
-                            high_duration += 180
+                except (IndexError, TypeError):
+                    continue
+                if level is not None and level >= 0:
+                    bucket_counts[_STRESS_BUCKET[min(int(level), 100)]] += 1
+
+            rest_duration, low_duration, medium_duration, high_duration = (
+                count * STRESS_SAMPLE_SECONDS for count in bucket_counts)
         
-        # Intensity minutes
-        intensity_mins = daily_stats.get('intensityMinutes', 0) or 0
-        if not intensity_mins:
-            mod_mins = daily_stats.get('moderateIntensityMinutes', 0) or 0
-            vig_mins = daily_stats.get('vigorousIntensityMinutes', 0) or 0
-            intensity_mins = mod_mins + vig_mins
+            # Intensity minutes
+            intensity_mins = daily_stats.get('intensityMinutes', 0) or 0
+            if not intensity_mins:
+                mod_mins = daily_stats.get('moderateIntensityMinutes', 0) or 0
+                vig_mins = daily_stats.get('vigorousIntensityMinutes', 0) or 0
+                intensity_mins = mod_mins + vig_mins
         
-        # Body composition - extract from Garmin data
-        weight_grams = 0
-        body_fat = 0
-        body_water = 0
-        muscle_mass_grams = 0
-        body_comp_date = today
-        has_today_body_comp = False
+            # Body composition - extract from Garmin data
+            weight_grams = 0
+            body_fat = 0
+            body_water = 0
+            muscle_mass_grams = 0
+            body_comp_date = today
+            has_today_body_comp = False
         
-        if isinstance(body_composition, dict):
             weight_list = body_composition.get('dateWeightList', []) or []
             if weight_list and len(weight_list) > 0:
                 # API returns list in reverse chronological order (newest first)
@@ -396,30 +737,29 @@ def get_stats():
                 muscle_mass_grams = avg.get('muscleMass', 0) or 0
                 has_today_body_comp = weight_grams > 0
         
-        # Convert weights
-        weight_kg = round(weight_grams / 1000, 1) if weight_grams else 0
-        weight_lbs = round(weight_grams / 453.592, 1) if weight_grams else 0
-        muscle_mass_kg = round(muscle_mass_grams / 1000, 1) if muscle_mass_grams else 0
+            # Convert weights
+            weight_kg = round(weight_grams / 1000, 1) if weight_grams else 0
+            weight_lbs = round(weight_grams / 453.592, 1) if weight_grams else 0
+            muscle_mass_kg = round(muscle_mass_grams / 1000, 1) if muscle_mass_grams else 0
         
-        # Use last known body comp if no data today
-        if not has_today_body_comp and last_body_comp:
-            weight_kg = last_body_comp['weightKg']
-            weight_lbs = last_body_comp['weightLbs']
-            body_fat = last_body_comp['bodyFatPercent']
-            body_water = last_body_comp['bodyWaterPercent']
-            muscle_mass_kg = last_body_comp['muscleMassKg']
-            body_comp_date = last_body_comp['date']
+            # Use last known body comp if no data today
+            if not has_today_body_comp and last_body_comp:
+                weight_kg = last_body_comp['weightKg']
+                weight_lbs = last_body_comp['weightLbs']
+                body_fat = last_body_comp['bodyFatPercent']
+                body_water = last_body_comp['bodyWaterPercent']
+                muscle_mass_kg = last_body_comp['muscleMassKg']
+                body_comp_date = last_body_comp['date']
         
-        # Waist - use last known value
-        waist_inches = last_waist['inches'] if last_waist else 0
-        waist_date = last_waist['date'] if last_waist else ''
-
-        # HRV data extraction (data is nested under hrvSummary)
-        hrv_average = 0
-        hrv_status = ''
-        hrv_balanced = 0
-        hrv_unbalanced = 0
-        if isinstance(hrv_data, dict):
+            # Waist - use last known value
+            waist_inches = last_waist['inches'] if last_waist else 0
+            waist_date = last_waist['date'] if last_waist else ''
+
+            # HRV data extraction (data is nested under hrvSummary)
+            hrv_average = 0
+            hrv_status = ''
+            hrv_balanced = 0
+            hrv_unbalanced = 0
             # Check for nested hrvSummary first
             hrv_summary = hrv_data.get('hrvSummary', {}) or {}
             if isinstance(hrv_summary, dict) and hrv_summary:
@@ -442,40 +782,39 @@ def get_stats():
                 else:
                     hrv_unbalanced = 1
 
-        # Training Readiness extraction (API returns a list)
-        tr_score = 0
-        tr_status = ''
-        if isinstance(training_readiness, list) and len(training_readiness) > 0:
-            tr_data = training_readiness[0]
-            tr_score = tr_data.get('score', 0) or 0
-            tr_status = tr_data.get('level', '') or ''
-        elif isinstance(training_readiness, dict):
-            tr_score = training_readiness.get('score', 0) or 0
-            tr_status = training_readiness.get('level', '') or ''
-
-        # Training Status extraction (complex nested structure)
-        ts_key = ''
-        ts_label = ''
-        vo2_max = 0
-        fitness_age = 0
-        recovery_time = 0
-        acute_load = 0
-        chronic_load = 0
-        load_ratio = 0.0
-        load_status = ''
-        fitness_trend = ''
-        training_load_balance = ''
-        aerobic_low = 0
-        aerobic_high = 0
-        anaerobic = 0
+            # Training Readiness extraction (API returns a list)
+            tr_score = 0
+            tr_status = ''
+            if isinstance(training_readiness, list) and len(training_readiness) > 0:
+                tr_data = training_readiness[0]
+                tr_score = tr_data.get('score', 0) or 0
+                tr_status = tr_data.get('level', '') or ''
+            elif isinstance(training_readiness, dict):
+                tr_score = training_readiness.get('score', 0) or 0
+                tr_status = training_readiness.get('level', '') or ''
+
+            # Training Status extraction (complex nested structure)
+            ts_key = ''
+            ts_label = ''
+            vo2_max = 0
+            fitness_age = 0
+            recovery_time = 0
+            acute_load = 0
+            chronic_load = 0
+            load_ratio = 0.0
+            load_status = ''
+            fitness_trend = ''
+            training_load_balance = ''
+            aerobic_low = 0
+            aerobic_high = 0
+            anaerobic = 0
         
-        if isinstance(training_status, dict):
             # VO2 Max from mostRecentVO2Max
             vo2_data = training_status.get('mostRecentVO2Max', {}) or {}
             if isinstance(vo2_data, dict):
                 generic = vo2_data.get('generic', {}) or {}
                 if isinstance(generic, dict):
-                    vo2_max = generic.get('vo2MaxPreciseValue', 0) or generic.get('vo2MaxValue', 0) or 0
+                    vo2_max = first_of(generic, 'vo2MaxPreciseValue', 'vo2MaxValue')
                     fitness_age = generic.get('fitnessAge', 0) or 0
             
             # Training status from mostRecentTrainingStatus
@@ -483,294 +822,205 @@ def get_stats():
             if isinstance(recent_status, dict):
                 latest_data = recent_status.get('latestTrainingStatusData', {}) or {}
                 if isinstance(latest_data, dict):
-                    # Get first device's data
-                    for device_id, device_data in latest_data.items():
-                        if isinstance(device_data, dict):
-                            ts_key = device_data.get('trainingStatus', 0) or 0
-                            ts_label = device_data.get('trainingStatusFeedbackPhrase', '') or ''
-                            fitness_trend = device_data.get('fitnessTrend', 0) or 0
-                            
-                            # Acute/Chronic Training Load
-                            acuteDTO = device_data.get('acuteTrainingLoadDTO', {}) or {}
-                            if isinstance(acuteDTO, dict):
-                                acute_load = acuteDTO.get('dailyTrainingLoadAcute', 0) or 0
-                                chronic_load = acuteDTO.get('dailyTrainingLoadChronic', 0) or 0
-                                load_ratio = acuteDTO.get('dailyAcuteChronicWorkloadRatio', 0.0) or 0.0
-                                load_status = acuteDTO.get('acwrStatus', '') or ''
-                            break
+                    # First device's data (the map is keyed by device id)
+                    device_data = next(
+                        (v for v in latest_data.values() if isinstance(v, dict)), None)
+                    if device_data is not None:
+                        ts_key = device_data.get('trainingStatus', 0) or 0
+                        ts_label = device_data.get('trainingStatusFeedbackPhrase', '') or ''
+                        fitness_trend = device_data.get('fitnessTrend', 0) or 0
+                        
+                        # Acute/Chronic Training Load
+                        acuteDTO = device_data.get('acuteTrainingLoadDTO', {}) or {}
+                        if isinstance(acuteDTO, dict):
+                            acute_load = acuteDTO.get('dailyTrainingLoadAcute', 0) or 0
+                            chronic_load = acuteDTO.get('dailyTrainingLoadChronic', 0) or 0
+                            load_ratio = acuteDTO.get('dailyAcuteChronicWorkloadRatio', 0.0) or 0.0
+                            load_status = acuteDTO.get('acwrStatus', '') or ''
             
             # Training Load Balance
             load_balance = training_status.get('mostRecentTrainingLoadBalance', {}) or {}
             if isinstance(load_balance, dict):
                 metrics_map = load_balance.get('metricsTrainingLoadBalanceDTOMap', {}) or {}
                 if isinstance(metrics_map, dict):
-                    for device_id, device_data in metrics_map.items():
-                        if isinstance(device_data, dict):
-                            aerobic_low = round(device_data.get('monthlyLoadAerobicLow', 0) or 0)
-                            aerobic_high = round(device_data.get('monthlyLoadAerobicHigh', 0) or 0)
-                            anaerobic = round(device_data.get('monthlyLoadAnaerobic', 0) or 0)
-                            training_load_balance = device_data.get('trainingBalanceFeedbackPhrase', '') or ''
-                            break
-
-        # All-day Respiration extraction
-        resp_avg = 0
-        resp_min = 0
-        resp_max = 0
-        if isinstance(respiration_data, dict):
-            resp_avg = respiration_data.get('avgWakingRespirationValue', 0) or respiration_data.get('averageRespirationValue', 0) or 0
+                    device_data = next(
+                        (v for v in metrics_map.values() if isinstance(v, dict)), None)
+                    if device_data is not None:
+                        aerobic_low = round(device_data.get('monthlyLoadAerobicLow', 0) or 0)
+                        aerobic_high = round(device_data.get('monthlyLoadAerobicHigh', 0) or 0)
+                        anaerobic = round(device_data.get('monthlyLoadAnaerobic', 0) or 0)
+                        training_load_balance = device_data.get('trainingBalanceFeedbackPhrase', '') or ''
+
+            # All-day Respiration extraction
+            resp_avg = 0
+            resp_min = 0
+            resp_max = 0
+            resp_avg = first_of(respiration_data, 'avgWakingRespirationValue', 'averageRespirationValue')
             resp_min = respiration_data.get('lowestRespirationValue', 0) or 0
             resp_max = respiration_data.get('highestRespirationValue', 0) or 0
 
-        # All-day SpO2 extraction
-        spo2_avg = 0
-        spo2_min = 0
-        if isinstance(spo2_data, dict):
-            spo2_avg = spo2_data.get('averageSPO2', 0) or spo2_data.get('averageSpO2', 0) or 0
-            spo2_min = spo2_data.get('lowestSPO2', 0) or spo2_data.get('lowestSpO2', 0) or 0
-
-        # Enhanced sleep metrics from sleep_dto
-        sleep_consistency = 0
-        sleep_alignment = 0
-        sleep_restfulness = 0
-        skin_temp_variance = 0
-
-        if isinstance(sleep_dto, dict):
-            # Sleep quality metrics
-            sleep_scores = sleep_dto.get('sleepScores', {}) or {}
-            if isinstance(sleep_scores, dict):
-                consistency_obj = sleep_scores.get('consistency', {}) or {}
-                if isinstance(consistency_obj, dict):
-                    sleep_consistency = consistency_obj.get('value', 0) or 0
-
-                alignment_obj = sleep_scores.get('alignment', {}) or {}
-                if isinstance(alignment_obj, dict):
-                    sleep_alignment = alignment_obj.get('value', 0) or 0
+            # All-day SpO2 extraction
+            spo2_avg = 0
+            spo2_min = 0
+            spo2_avg = first_of(spo2_data, 'averageSPO2', 'averageSpO2')
+            spo2_min = first_of(spo2_data, 'lowestSPO2', 'lowestSpO2')
 
-                restfulness_obj = sleep_scores.get('restfulness', {}) or {}
-                if isinstance(restfulness_obj, dict):
-                    sleep_restfulness = restfulness_obj.get('value', 0) or 0
+            # Build response
+            steps_yesterday = yesterday_stats.get('totalSteps', 0) or 0
 
-            # Skin temperature variance
-            skin_temp_variance = sleep_dto.get('skinTempVariance', 0) or 0
+            summary = pick(daily_stats, SUMMARY_FIELDS)
+            summary['stepsYesterday'] = steps_yesterday
+            summary['intensityMinutes'] = intensity_mins
 
-        # Build response
-        steps_yesterday = yesterday_stats.get('totalSteps', 0) or 0
-
-        response = {
-            "date": today,
-            "timezone": user_timezone,
-            "localTime": now_user_tz.isoformat(),
-            "summary": {
-                "totalSteps": daily_stats.get('totalSteps', 0) or 0,
-                "stepsYesterday": steps_yesterday,
-                "distanceMeters": daily_stats.get('totalDistanceMeters', 0) or 0,
-                "floorsClimbed": daily_stats.get('floorsAscended', 0) or 0,
-                "restingHeartRate": daily_stats.get('restingHeartRate', 0) or 0,
-                "minHeartRate": daily_stats.get('minHeartRate', 0) or 0,
-                "maxHeartRate": daily_stats.get('maxHeartRate', 0) or 0,
-                "activeKilocalories": daily_stats.get('activeKilocalories', 0) or 0,
-                "totalKilocalories": daily_stats.get('totalKilocalories', 0) or 0,
-                "intensityMinutes": intensity_mins,
-                "moderateIntensityMinutes": daily_stats.get('moderateIntensityMinutes', 0) or 0,
-                "vigorousIntensityMinutes": daily_stats.get('vigorousIntensityMinutes', 0) or 0
-            },
-            "sleep": {
-                "overallScore": overall_score,
-                "totalSeconds": sleep_dto.get('sleepTimeSeconds', 0) or 0,
-                "deepSeconds": deep_seconds,
-                "lightSeconds": light_seconds,
-                "remSeconds": rem_seconds,
-                "awakeSeconds": awake_seconds,
-                "avgStress": sleep_dto.get('avgSleepStress', 0) or 0,
-                "avgSpO2": sleep_dto.get('averageSpO2Value', 0) or 0,
-                "avgRespiration": sleep_dto.get('averageRespirationValue', 0) or 0,
-                "startTime": sleep_dto.get('sleepStartTimestampGMT', 0) or 0,
-                "endTime": sleep_dto.get('sleepEndTimestampGMT', 0) or 0,
-                "consistency": sleep_consistency,
-                "alignment": sleep_alignment,
-                "restfulness": sleep_restfulness
-            },
-            "stress": {
-                "averageLevel": (stress_data.get('avgStressLevel', 0) if isinstance(stress_data, dict) else 0) or 0,
-                "maxLevel": (stress_data.get('maxStressLevel', 0) if isinstance(stress_data, dict) else 0) or 0,
-                "restDurationSeconds": rest_duration,
-                "lowDurationSeconds": low_duration,
-                "mediumDurationSeconds": medium_duration,
-                "highDurationSeconds": high_duration
-            },
-            "bodyBattery": {
-                "current": bb_current,
-                "highest": bb_highest,
-                "lowest": bb_lowest,
-                "charged": bb_charged,
-                "drained": bb_drained
-            },
-            "bodyComposition": {
-                "weightKg": weight_kg,
-                "weightLbs": weight_lbs,
-                "bodyFatPercent": body_fat,
-                "bodyWaterPercent": body_water,
-                "muscleMassKg": muscle_mass_kg,
-                "date": body_comp_date
-            },
-            "waist": {
-                "inches": waist_inches,
-                "date": waist_date
-            },
-            "hrv": {
-                "average": hrv_average,
-                "status": hrv_status,
-                "balanced": hrv_balanced,
-                "unbalanced": hrv_unbalanced
-            },
-            "trainingReadiness": {
-                "score": tr_score,
-                "status": tr_status
-            },
-            "trainingStatus": {
-                "statusKey": ts_key,
-                "statusLabel": ts_label,
-                "vo2Max": vo2_max,
-                "fitnessAge": fitness_age,
-                "fitnessTrend": fitness_trend,
-                "acuteLoad": acute_load,
-                "chronicLoad": chronic_load,
-                "loadRatio": load_ratio,
-                "loadStatus": load_status,
-                "trainingLoadBalance": training_load_balance,
-                "aerobicLow": aerobic_low,
-                "aerobicHigh": aerobic_high,
-                "anaerobic": anaerobic
-            },
-            "allDayRespiration": {
-                "average": resp_avg,
-                "min": resp_min,
-                "max": resp_max
-            },
-            "allDaySpO2": {
-                "average": spo2_avg,
-                "min": spo2_min
-            },
-            "skinTemp": {
-                "variance": skin_temp_variance
+            response = {
+                "date": today,
+                "timezone": user_timezone,
+                "localTime": now_user_tz.isoformat(),
+                "summary": summary,
+                "sleep": sleep_section,
+                "stress": {
+                    "averageLevel": stress_data.get('avgStressLevel', 0) or 0,
+                    "maxLevel": stress_data.get('maxStressLevel', 0) or 0,
+                    "restDurationSeconds": rest_duration,
+                    "lowDurationSeconds": low_duration,
+                    "mediumDurationSeconds": medium_duration,
+                    "highDurationSeconds": high_duration
+                },
+                "bodyBattery": {
+                    "current": bb_current,
+                    "highest": bb_highest,
+                    "lowest": bb_lowest,
+                    "charged": bb_charged,
+                    "drained": bb_drained
+                },
+                "bodyComposition": {
+                    "weightKg": weight_kg,
+                    "weightLbs": weight_lbs,
+                    "bodyFatPercent": body_fat,
+                    "bodyWaterPercent": body_water,
+                    "muscleMassKg": muscle_mass_kg,
+                    "date": body_comp_date
+                },
+                "waist": {
+                    "inches": waist_inches,
+                    "date": waist_date
+                },
+                "hrv": {
+                    "average": hrv_average,
+                    "status": hrv_status,
+                    "balanced": hrv_balanced,
+                    "unbalanced": hrv_unbalanced
+                },
+                "trainingReadiness": {
+                    "score": tr_score,
+                    "status": tr_status
+                },
+                "trainingStatus": {
+                    "statusKey": ts_key,
+                    "statusLabel": ts_label,
+                    "vo2Max": vo2_max,
+                    "fitnessAge": fitness_age,
+                    "fitnessTrend": fitness_trend,
+                    "acuteLoad": acute_load,
+                    "chronicLoad": chronic_load,
+                    "loadRatio": load_ratio,
+                    "loadStatus": load_status,
+                    "trainingLoadBalance": training_load_balance,
+                    "aerobicLow": aerobic_low,
+                    "aerobicHigh": aerobic_high,
+                    "anaerobic": anaerobic
+                },
+                "allDayRespiration": {
+                    "average": resp_avg,
+                    "min": resp_min,
+                    "max": resp_max
+                },
+                "allDaySpO2": {
+                    "average": spo2_avg,
+                    "min": spo2_min
+                },
+                "skinTemp": {
+                    "variance": skin_temp_variance
+                }
             }
-        }
         
-        # Save to CSV (upsert by date)
-        # Note: We leave waist/body comp empty here - they will be preserved from existing row in upsert
-        csv_row = {
-            'date': today,
-            'totalSteps': response['summary']['totalSteps'],
-            'stepsYesterday': response['summary']['stepsYesterday'],
-            'distanceMeters': response['summary']['distanceMeters'],
-            'floorsClimbed': response['summary']['floorsClimbed'],
-            'restingHeartRate': response['summary']['restingHeartRate'],
-            'minHeartRate': response['summary']['minHeartRate'],
-            'maxHeartRate': response['summary']['maxHeartRate'],
-            'activeKilocalories': response['summary']['activeKilocalories'],
-            'totalKilocalories': response['summary']['totalKilocalories'],
-            'intensityMinutes': response['summary']['intensityMinutes'],
-            'moderateIntensityMinutes': response['summary']['moderateIntensityMinutes'],
-            'vigorousIntensityMinutes': response['summary']['vigorousIntensityMinutes'],
-            'sleepScore': response['sleep']['overallScore'],
-            'sleepTotalSeconds': response['sleep']['totalSeconds'],
-            'sleepDeep': response['sleep']['deepSeconds'],
-            'sleepLight': response['sleep']['lightSeconds'],
-            'sleepRem': response['sleep']['remSeconds'],
-            'sleepAwake': response['sleep']['awakeSeconds'],
-            'sleepStress': response['sleep']['avgStress'],
-            'sleepSpO2': response['sleep']['avgSpO2'],
-            'sleepRespiration': response['sleep']['avgRespiration'],
-            'sleepStart': response['sleep']['startTime'],
-            'sleepEnd': response['sleep']['endTime'],
-            'sleepConsistency': response['sleep']['consistency'],
-            'sleepAlignment': response['sleep']['alignment'],
-            'sleepRestfulness': response['sleep']['restfulness'],
-            'stressAvg': response['stress']['averageLevel'],
-            'stressMax': response['stress']['maxLevel'],
-            'stressRest': response['stress']['restDurationSeconds'],
-            'stressLow': response['stress']['lowDurationSeconds'],
-            'stressMed': response['stress']['mediumDurationSeconds'],
-            'stressHigh': response['stress']['highDurationSeconds'],
-            'bbCurrent': response['bodyBattery']['current'],
-            'bbHigh': response['bodyBattery']['highest'],
-            'bbLow': response['bodyBattery']['lowest'],
-            'bbCharged': response['bodyBattery']['charged'],
-            'bbDrained': response['bodyBattery']['drained'],
-            'hrvAverage': response['hrv']['average'],
-            'hrvStatus': response['hrv']['status'],
-            'hrvBalanced': response['hrv']['balanced'],
-            'hrvUnbalanced': response['hrv']['unbalanced'],
-            'trainingReadinessScore': response['trainingReadiness']['score'],
-            'trainingReadinessStatus': response['trainingReadiness']['status'],
-            'trainingStatusKey': response['trainingStatus']['statusKey'],
-            'trainingStatusLabel': response['trainingStatus']['statusLabel'],
-            'vo2MaxValue': response['trainingStatus']['vo2Max'],
-            'fitnessAge': response['trainingStatus']['fitnessAge'],
-            'fitnessTrend': response['trainingStatus']['fitnessTrend'],
-            'acuteLoad': response['trainingStatus']['acuteLoad'],
-            'chronicLoad': response['trainingStatus']['chronicLoad'],
-            'loadRatio': response['trainingStatus']['loadRatio'],
-            'loadStatus': response['trainingStatus']['loadStatus'],
-            'trainingLoadBalance': response['trainingStatus']['trainingLoadBalance'],
-            'aerobicLow': response['trainingStatus']['aerobicLow'],
-            'aerobicHigh': response['trainingStatus']['aerobicHigh'],
-            'anaerobic': response['trainingStatus']['anaerobic'],
-            'respirationAvg': response['allDayRespiration']['average'],
-            'respirationMin': response['allDayRespiration']['min'],
-            'respirationMax': response['allDayRespiration']['max'],
-            'spo2Avg': response['allDaySpO2']['average'],
-            'spo2Min': response['allDaySpO2']['min'],
-            'skinTempVariance': response['skinTemp']['variance'],
-            'weightKg': weight_kg if has_today_body_comp else '',
-            'weightLbs': weight_lbs if has_today_body_comp else '',
-            'bodyFatPercent': body_fat if has_today_body_comp else '',
-            'bodyWaterPercent': body_water if has_today_body_comp else '',
-            'muscleMassKg': muscle_mass_kg if has_today_body_comp else '',
-            'bodyCompDate': body_comp_date if has_today_body_comp else '',
-            'waistInches': '',  # Preserve from existing row only
-            'waistDate': ''     # Preserve from existing row only
-        }
+            # Save to CSV (upsert by date)
+            # Note: We leave waist/body comp empty here - they will be preserved from existing row in upsert
+            csv_row = {'date': today}
+            for column, section, key in CSV_FROM_RESPONSE:
+                csv_row[column] = response[section][key]
+            csv_row.update({
+                'weightKg': weight_kg if has_today_body_comp else '',
+                'weightLbs': weight_lbs if has_today_body_comp else '',
+                'bodyFatPercent': body_fat if has_today_body_comp else '',
+                'bodyWaterPercent': body_water if has_today_body_comp else '',
+                'muscleMassKg': muscle_mass_kg if has_today_body_comp else '',
+                'bodyCompDate': body_comp_date if has_today_body_comp else '',
+                'waistInches': '',  # Preserve from existing row only
+                'waistDate': ''     # Preserve from existing row only
+            })
         
-        # Upsert row
-        found = False
-        for i, row in enumerate(csv_rows):
-            if row.get('date') == today:
+            # Upsert row - O(1) via a date index instead of a linear scan
+            row_index = {row.get('date'): i for i, row in enumerate(csv_rows)}
+            i = row_index.get(today)
+            if i is not None:
+                existing = csv_rows[i]
                 # ALWAYS preserve waist from existing row if it has data
-                existing_waist = csv_rows[i].get('waistInches')
+                existing_waist = existing.get('waistInches')
                 if existing_waist and str(existing_waist).strip():
                     csv_row['waistInches'] = existing_waist
-                    csv_row['waistDate'] = csv_rows[i].get('waistDate', today)
+                    csv_row['waistDate'] = existing.get('waistDate', today)
                 # ALWAYS preserve body comp from existing row if it has data
-                existing_weight = csv_rows[i].get('weightKg')
+                existing_weight = existing.get('weightKg')
                 if existing_weight and str(existing_weight).strip():
                     csv_row['weightKg'] = existing_weight
-                    csv_row['weightLbs'] = csv_rows[i].get('weightLbs', '')
-                    csv_row['bodyFatPercent'] = csv_rows[i].get('bodyFatPercent', '')
-                    csv_row['bodyWaterPercent'] = csv_rows[i].get('bodyWaterPercent', '')
-                    csv_row['muscleMassKg'] = csv_rows[i].get('muscleMassKg', '')
-                    csv_row['bodyCompDate'] = csv_rows[i].get('bodyCompDate', today)
+                    csv_row['weightLbs'] = existing.get('weightLbs', '')
+                    csv_row['bodyFatPercent'] = existing.get('bodyFatPercent', '')
+                    csv_row['bodyWaterPercent'] = existing.get('bodyWaterPercent', '')
+                    csv_row['muscleMassKg'] = existing.get('muscleMassKg', '')
+                    csv_row['bodyCompDate'] = existing.get('bodyCompDate', today)
                 csv_rows[i] = csv_row
-                found = True
-                break
-        
-        if not found:
-            csv_rows.append(csv_row)
-        
-        # Sort by date
-        csv_rows.sort(key=lambda x: x.get('date', ''))
-        
-        # Write to blob
-        write_csv_to_blob(csv_rows)
+                # CSV round-trips every value as text, so compare the
+                # stringified row; if nothing changed the blob is already
+                # current and the rewrite (PUT + old-blob deletes) can be
+                # skipped
+                row_unchanged = all(
+                    str(csv_row.get(col, '')) == str(existing.get(col, ''))
+                    for col in CSV_HEADERS
+                )
+            else:
+                # Rows are written date-sorted, and today sorts after every
+                # existing row in the common case - only re-sort on the rare
+                # out-of-order insert (e.g. a backfilled blob)
+                csv_rows.append(csv_row)
+                if len(csv_rows) > 1 and csv_rows[-2].get('date', '') > today:
+                    csv_rows.sort(key=lambda x: x.get('date', ''))
+                row_unchanged = False
         
-        return jsonify(response)
+            # Write to blob
+            if not row_unchanged:
+                write_csv_to_blob(csv_rows)
+
+            # Serialize once; the bytes double as the cache entry and the
+            # basis for the ETag, so unchanged payloads become a 304
+            payload = app.json.dumps(response).encode('utf-8')
+            etag = '"%s"' % hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+            _stats_cache['payload'] = payload
+            _stats_cache['etag'] = etag
+            _stats_cache['expires'] = time.time() + STATS_CACHE_SECONDS
+
+            return stats_response(payload, etag)
     
     except Exception as e:
         error_msg = str(e) if str(e) else type(e).__name__
-        traceback_str = traceback.format_exc()
-        print(f"Error in get_stats: {error_msg}")
-        print(f"Traceback: {traceback_str}")
-        return jsonify({"error": error_msg, "details": traceback_str}), 500
+        logger.exception("Error in get_stats: %s", error_msg)
+        payload = {"error": error_msg}
+        # Tracebacks are for the server logs; only echo one to the client
+        # when explicitly asked for
+        if os.environ.get('DEBUG') or request.args.get('debug'):
+            payload["details"] = traceback.format_exc()
+        return jsonify(payload), 500
 
 @app.route('/api/waist', methods=['POST'])
 def save_waist():
@@ -785,30 +1035,30 @@ def save_waist():
         today = date.today().isoformat()
         csv_rows = read_csv_from_blob()
         
-        # Find or create today's row
-        found = False
-        for i, row in enumerate(csv_rows):
-            if row.get('date') == today:
-                csv_rows[i]['waistInches'] = waist_inches
-                csv_rows[i]['waistDate'] = today
-                found = True
-                break
-        
-        if not found:
+        # Find or create today's row - same date-index upsert as /api/stats
+        row_index = {row.get('date'): i for i, row in enumerate(csv_rows)}
+        i = row_index.get(today)
+        if i is not None:
+            # Replace rather than mutate - the row dict may be shared
+            # with the in-process CSV cache
+            csv_rows[i] = {**csv_rows[i], 'waistInches': waist_inches, 'waistDate': today}
+        else:
             # Create a new row with just the waist data
             new_row = {header: '' for header in CSV_HEADERS}
             new_row['date'] = today
             new_row['waistInches'] = waist_inches
             new_row['waistDate'] = today
             csv_rows.append(new_row)
-        
-        # Sort by date
-        csv_rows.sort(key=lambda x: x.get('date', ''))
-        
+            # A new day's row sorts last; only re-sort on an out-of-order blob
+            if len(csv_rows) > 1 and csv_rows[-2].get('date', '') > today:
+                csv_rows.sort(key=lambda x: x.get('date', ''))
+
         # Write to blob
         success = write_csv_to_blob(csv_rows)
         
         if success:
+            # Drop the cached stats response so the new measurement shows up
+            _stats_cache['payload'] = None
             return jsonify({"success": True, "inches": waist_inches, "date": today})
         else:
             return jsonify({"error": "Failed to save to storage"}), 500
@@ -825,20 +1075,37 @@ def download_csv():
         if not csv_rows:
             return jsonify({"error": "No data available"}), 404
         
-        # Create CSV content with BOM for Excel compatibility
-        output = io.StringIO()
-        output.write('\ufeff')  # UTF-8 BOM for Excel
-        writer = csv.DictWriter(output, fieldnames=CSV_HEADERS)
-        writer.writeheader()
-        for row in csv_rows:
-            writer.writerow(row)
-        
-        csv_content = output.getvalue()
+        # Reuse the blob's own ETag (captured by the row cache) so repeat
+        # downloads of unchanged data cost a 304 instead of a re-send
+        headers = {
+            'Content-Disposition': 'attachment; filename=garmin-data.csv',
+            'Cache-Control': 'private, max-age=300',
+        }
+        etag = _csv_cache['etag']
+        if etag:
+            headers['ETag'] = etag
+            if request.headers.get('If-None-Match') == etag:
+                return Response(status=304, headers=headers)
         
+        # Stream the CSV in batches instead of building the whole file in
+        # memory first - first bytes go out immediately and peak memory stays
+        # at one batch regardless of how much history accumulates
+        def generate(rows, batch_size=100):
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=CSV_HEADERS)
+            buffer.write('\ufeff')  # UTF-8 BOM for Excel
+            writer.writeheader()
+            yield buffer.getvalue()
+            for start in range(0, len(rows), batch_size):
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows(rows[start:start + batch_size])
+                yield buffer.getvalue()
+
         return Response(
-            csv_content,
+            generate(csv_rows),
             mimetype='text/csv',
-            headers={'Content-Disposition': 'attachment; filename=garmin-data.csv'}
+            headers=headers
         )
     
     except Exception as e:
@@ -851,83 +1118,57 @@ def debug():
         client = get_garmin_client()
         today = date.today().isoformat()
 
-        sleep_data = {}
-        stress_data = {}
-        body_battery = {}
-        hrv_data = {}
-        training_readiness = {}
-        training_status = {}
-        respiration_data = {}
-        spo2_data = {}
-
-        try:
-            sleep_data = client.get_sleep_data(today) or {}
-        except Exception as e:
-            sleep_data = {"error": str(e)}
-
-        try:
-            stress_data = client.get_stress_data(today) or {}
-        except Exception as e:
-            stress_data = {"error": str(e)}
-
-        try:
-            body_battery = client.get_body_battery(today) or {}
-        except Exception as e:
-            body_battery = {"error": str(e)}
-
-        try:
-            hrv_data = client.get_hrv_data(today) or {}
-        except Exception as e:
-            hrv_data = {"error": str(e)}
-
-        try:
-            training_readiness = client.get_training_readiness(today) or {}
-        except Exception as e:
-            training_readiness = {"error": str(e)}
+        # Same concurrent fan-out as /api/stats; a failed call keeps its
+        # old error shape ({"error": ...}) in the payload
+        calls = {
+            'sleep_raw': client.get_sleep_data,
+            'stress_raw': client.get_stress_data,
+            'body_battery_raw': client.get_body_battery,
+            'hrv_raw': client.get_hrv_data,
+            'training_readiness_raw': client.get_training_readiness,
+            'training_status_raw': client.get_training_status,
+            'respiration_raw': client.get_respiration_data,
+            'spo2_raw': client.get_spo2_data,
+        }
 
-        try:
-            training_status = client.get_training_status(today) or {}
-        except Exception as e:
-            training_status = {"error": str(e)}
+        def fetch_raw(name):
+            try:
+                return calls[name](today) or {}
+            except Exception as e:
+                return {"error": str(e)}
 
-        try:
-            respiration_data = client.get_respiration_data(today) or {}
-        except Exception as e:
-            respiration_data = {"error": str(e)}
+        with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+            results = dict(zip(calls, executor.map(fetch_raw, calls)))
 
-        try:
-            spo2_data = client.get_spo2_data(today) or {}
-        except Exception as e:
-            spo2_data = {"error": str(e)}
-
-        return jsonify({
-            "date": today,
-            "sleep_raw": sleep_data,
-            "stress_raw": stress_data,
-            "body_battery_raw": body_battery,
-            "hrv_raw": hrv_data,
-            "training_readiness_raw": training_readiness,
-            "training_status_raw": training_status,
-            "respiration_raw": respiration_data,
-            "spo2_raw": spo2_data
-        })
+        return jsonify({"date": today, **results})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/health')
 def health():
-    """Health check endpoint."""
-    email = os.environ.get('GARMIN_EMAIL', '')
-    password = os.environ.get('GARMIN_PASSWORD', '')
-    tokens = os.environ.get('GARMIN_TOKENS', '')
-    blob_token = os.environ.get('BLOB_READ_WRITE_TOKEN', '')
-    
+    """Health check endpoint - cheap env checks only, safe for frequent polling."""
+    return jsonify({
+        "status": "ok",
+        "env_check": {
+            "email_set": bool(GARMIN_EMAIL),
+            "password_set": bool(GARMIN_PASSWORD),
+            "tokens_set": bool(GARMIN_TOKENS),
+            "blob_token_set": bool(BLOB_TOKEN)
+        }
+    })
+
+@app.route('/api/health/deep')
+def health_deep():
+    """Deep health check that also validates the stored Garmin tokens."""
+    tokens = GARMIN_TOKENS
+
     token_load_status = "not_attempted"
     token_error = None
     profile_name = None
-    
+
     if tokens:
         try:
+            from garminconnect import Garmin
             client = Garmin()
             client.garth.loads(tokens)
             profile_name = client.garth.profile.get("displayName", "unknown")
@@ -935,14 +1176,14 @@ def health():
         except Exception as e:
             token_load_status = "failed"
             token_error = str(e)
-    
+
     return jsonify({
         "status": "ok",
         "env_check": {
-            "email_set": bool(email),
-            "password_set": bool(password),
+            "email_set": bool(GARMIN_EMAIL),
+            "password_set": bool(GARMIN_PASSWORD),
             "tokens_set": bool(tokens),
-            "blob_token_set": bool(blob_token),
+            "blob_token_set": bool(BLOB_TOKEN),
             "token_load_status": token_load_status,
             "token_error": token_error,
             "profile_name": profile_name
@@ -950,6 +1191,4 @@ def health():
     })
 
 if __name__ == '__main__':
-    from dotenv import load_dotenv
-    load_dotenv()
     app.run(debug=True, port=5000)